@@ -0,0 +1,95 @@
+"""
+Response cache for deterministic analysis endpoints
+"""
+
+import functools
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+import orjson
+
+from storage.duck import dataset_version, get_cached_result, put_cached_result
+from .concurrency import run_blocking
+
+CACHE_SIZE = 256
+
+_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+_cache_lock = Lock()
+_MISS = object()
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def _get(key: Hashable) -> Any:
+    with _cache_lock:
+        value = _cache.get(key, _MISS)
+        if value is not _MISS:
+            _cache.move_to_end(key)
+        return value
+
+
+def _put(key: Hashable, value: Any) -> None:
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _digest(key: Hashable, dataset_ids: tuple) -> str:
+    """Digest of the key together with the current version of each dataset"""
+    versions = tuple(dataset_version(d) for d in dataset_ids)
+    return hashlib.blake2b(repr((key, versions)).encode(), digest_size=16).hexdigest()
+
+
+def _store(name: str, digest: str, dataset_ids: tuple, value: Any) -> None:
+    try:
+        payload = orjson.dumps(
+            value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    except TypeError:
+        return  # not JSON-encodable by orjson; keep it in memory only
+    put_cached_result(name, digest, list(dataset_ids), payload)
+
+
+def cached_response(*id_params: str) -> Callable:
+    """
+    Cache an async endpoint's response, keyed on its arguments and the
+    last_ingested version of each named dataset id parameter. Hits come from an
+    in-process LRU (CACHE_SIZE entries) backed by the DuckDB meta_cache table,
+    which survives restarts and keeps small payloads only (see
+    storage.duck.put_cached_result); re-ingesting a dataset invalidates both.
+    Errors are not cached.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs: Any) -> Any:
+            dataset_ids = tuple(kwargs[p] for p in id_params)
+            digest = await run_blocking(_digest, (name, _freeze(kwargs)), dataset_ids)
+            value = _get(digest)
+            if value is not _MISS:
+                return value
+
+            payload = await run_blocking(get_cached_result, name, digest)
+            if payload is not None:
+                value = orjson.loads(payload)
+            else:
+                value = await func(**kwargs)
+                await run_blocking(_store, name, digest, dataset_ids, value)
+            _put(digest, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,64 @@
+"""
+Thread offloading for blocking DuckDB and analysis work
+"""
+
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+import anyio
+
+from storage.duck import CURSOR_POOL_SIZE
+
+# Analysis work gets its own bounded pool so long DuckDB scans and PSI math
+# can't exhaust the default threadpool that serves uploads and metadata calls
+ANALYSIS_THREADS = 8
+
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+# Independent per-column queries inside one request fan out over a separate
+# pool sized to the cursor pool; it never runs anything that submits back to
+# it or to the analysis limiter, so a busy request can't deadlock either
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _analysis_limiter() -> anyio.CapacityLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(ANALYSIS_THREADS)
+    return _limiter
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call in the analysis threadpool and await its result"""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs), limiter=_analysis_limiter()
+    )
+
+
+def _query_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=CURSOR_POOL_SIZE, thread_name_prefix="duck-query"
+        )
+    return _executor
+
+
+def map_blocking(func: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+    """
+    Run func over items concurrently, each call on its own pooled cursor;
+    results come back in input order. Called from blocking code only.
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    return list(_query_executor().map(func, items))
+
+
+def shutdown_executor() -> None:
+    """Stop the per-column query pool on exit"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -3,6 +3,10 @@ FastAPI backend for EDA Dashboard
 Handles file uploads, DuckDB operations, and data analysis
 """
 
+from contextlib import asynccontextmanager
+
+import orjson
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -14,12 +18,43 @@ from .routers import distributions as distribution_router
 from .routers import correlation as correlation_router
 from .routers import fairness_drift as fairness_drift_router
 
+from .concurrency import shutdown_executor
 from storage.duck import (
+    close_connection,
+    cursor,
     get_tables,
-    connect,
+    init_db,
 )
 
-app = FastAPI(title="EDA Dashboard API", version="1.0.0")
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson; NaN/inf become null. FastAPI still runs
+    jsonable_encoder on route return values first, so routes return plain
+    Python values; orjson only speeds up the final dump.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database once at startup and release it on shutdown"""
+    init_db()
+    yield
+    shutdown_executor()
+    close_connection()
+
+
+app = FastAPI(
+    title="EDA Dashboard API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.include_router(dataset_router.router)
 app.include_router(zip_router.router)
 app.include_router(distribution_router.router)
@@ -66,7 +101,8 @@ def health():
     """Detailed health check"""
     try:
         # Test DuckDB connection
-        connect()
+        with cursor() as con:
+            con.execute("SELECT 1").fetchone()
         tables = get_tables()
         return {
             "status": "healthy",
@@ -0,0 +1,12 @@
+"""
+Shared path parameter types
+"""
+
+from typing import Annotated
+
+from fastapi import Path
+
+from storage.duck import DATASET_ID_PATTERN
+
+# Rejected with a 422 before any SQL is built from it
+DatasetId = Annotated[str, Path(pattern=DATASET_ID_PATTERN)]
@@ -1,43 +1,52 @@
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
-from storage.duck import connect
+from storage.duck import cursor, dataset_table, get_column_meta, quote_ident
+from ..cache import cached_response
+from ..concurrency import run_blocking
+from ..params import DatasetId
+from ..streaming import (
+    arrow_response,
+    ndjson_lines,
+    ndjson_response,
+    wants_arrow,
+    wants_ndjson,
+)
 
 router = APIRouter()
 
 
-@router.get("/datasets/{dataset_id}/correlation", tags=["Correlation Matrix"])
-def get_correlation_matrix(dataset_id: str):
-    """Get correlation matrix for all numeric columns"""
-    try:
-        table_name = f"ds_{dataset_id}"
-        con = connect()
-
-        # Get numeric columns from schema (no data load)
-        columns_query = f"DESCRIBE SELECT * FROM {table_name}"
-        columns_info = con.execute(columns_query).df()
-
-        numeric_types = [
-            "BIGINT",
-            "INTEGER",
-            "DOUBLE",
-            "FLOAT",
-            "DECIMAL",
-            "HUGEINT",
-            "SMALLINT",
-            "TINYINT",
-            "UBIGINT",
-            "UINTEGER",
-            "USMALLINT",
-            "UTINYINT",
-            "REAL",
+def _corr_in_numpy(con, table_name: str, num_cols: List[str]) -> np.ndarray:
+    """Pearson matrix computed locally; pairwise-complete like DuckDB's CORR"""
+    cols_str = ", ".join(quote_ident(col) for col in num_cols)
+    data = con.execute(f"SELECT {cols_str} FROM {table_name}").fetchnumpy()
+    block = np.column_stack(
+        [
+            np.ma.filled(np.ma.asarray(data[col], dtype=np.float64), np.nan)
+            for col in num_cols
         ]
+    )
+
+    if np.isnan(block).any():
+        matrix = pd.DataFrame(block).corr().to_numpy(copy=True)
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            matrix = np.corrcoef(block, rowvar=False)
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
 
-        num_cols: List[str] = columns_info[
-            columns_info["column_type"].isin(numeric_types)
-        ]["column_name"].tolist()
+
+def _correlation_matrix(dataset_id: str):
+    """Blocking body of the correlation endpoint"""
+    try:
+        table_name = dataset_table(dataset_id)
+        # Numeric columns from the metadata recorded at ingest (no data load)
+        num_cols: List[str] = [
+            col["name"] for col in get_column_meta(dataset_id) if col["is_numeric"]
+        ]
 
         if len(num_cols) < 2:
             raise HTTPException(
@@ -45,33 +54,39 @@ def get_correlation_matrix(dataset_id: str):
                 detail="Need at least 2 numeric columns for correlation",
             )
 
-        # Compute all correlations in DuckDB (no table load!)
-        corr_calcs = []
-        for col in num_cols:
-            corr_calcs.append(f'CORR("{col}", "{col}") as "{col}_{col}"')  # Diagonal
-            for other_col in num_cols:
-                if col < other_col:  # Avoid duplicates
-                    corr_calcs.append(
-                        f'CORR("{col}", "{other_col}") as "{col}_{other_col}"'
-                    )
-
-        query = f"SELECT {', '.join(corr_calcs)} FROM {table_name}"
-        corr_results = con.execute(query).df()
-
-        # Reconstruct symmetric correlation matrix
-        corr = pd.DataFrame(
-            np.eye(len(num_cols)), index=pd.Index(num_cols), columns=pd.Index(num_cols)
-        )
+        with cursor() as con:
+            n = len(num_cols)
+            n_rows = con.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+            if n * n > n_rows:
+                # Wide, short table: the N² aggregate query costs more to plan than
+                # the data costs to move, so pull the numeric block and use BLAS
+                matrix = _corr_in_numpy(con, table_name, num_cols)
+            else:
+                # Compute all correlations in DuckDB (no table load!), upper triangle only
+                upper = np.triu_indices(n, k=1)
+                corr_calcs = [
+                    f"CORR({quote_ident(num_cols[i])}, {quote_ident(num_cols[j])})"
+                    for i, j in zip(*upper)
+                ]
+
+                query = f"SELECT {', '.join(corr_calcs)} FROM {table_name}"
+                row = con.execute(query).fetchone()
 
-        for col in num_cols:
-            corr.loc[col, col] = 1.0
-            for other_col in num_cols:
-                if col < other_col:
-                    val = corr_results[f"{col}_{other_col}"].iloc[0]
-                    corr.loc[col, other_col] = val
-                    corr.loc[other_col, col] = val
+                # Reconstruct symmetric correlation matrix (NULL -> NaN)
+                vals = np.array(row, dtype=np.float64)
+                matrix = np.eye(n)
+                matrix[upper] = vals
+                matrix.T[upper] = vals
 
-        return {"success": True, "correlation": corr.to_dict(), "columns": num_cols}
+            # Nested {column: {row: value}} straight from the matrix rows, same
+            # shape as DataFrame.to_dict() without building a labelled frame
+            corr = {
+                col: dict(zip(num_cols, values))
+                for col, values in zip(num_cols, matrix.T.tolist())
+            }
+
+            return {"success": True, "correlation": corr, "columns": num_cols}
 
     except HTTPException:
         raise
@@ -79,3 +94,40 @@ def get_correlation_matrix(dataset_id: str):
         raise HTTPException(
             status_code=500, detail=f"Failed to compute correlation: {str(e)}"
         )
+
+
+@cached_response("dataset_id")
+async def _cached_correlation_matrix(dataset_id: str):
+    return await run_blocking(_correlation_matrix, dataset_id)
+
+
+@router.get("/datasets/{dataset_id}/correlation", tags=["Correlation Matrix"])
+async def get_correlation_matrix(dataset_id: DatasetId, request: Request):
+    """
+    Get correlation matrix for all numeric columns
+    With Accept: application/x-ndjson, streams a {"columns": [...]} line then one
+    {"column", "correlation"} line per matrix row; with Accept:
+    application/vnd.apache.arrow.stream, returns an Arrow IPC stream with a
+    "column" label column and one float64 column per numeric column
+    """
+    result = await _cached_correlation_matrix(dataset_id=dataset_id)
+    if wants_arrow(request):
+        columns = result["columns"]
+        corr = result["correlation"]
+        table = pa.table(
+            {
+                "column": pa.array(columns, pa.string()),
+                **{
+                    col: pa.array([corr[col][row] for row in columns], pa.float64())
+                    for col in columns
+                },
+            }
+        )
+        return arrow_response(table)
+    if wants_ndjson(request):
+        rows = (
+            {"column": col, "correlation": values}
+            for col, values in result["correlation"].items()
+        )
+        return ndjson_response(ndjson_lines({"columns": result["columns"]}, rows))
+    return result
@@ -1,27 +1,73 @@
 from __future__ import annotations
+import hashlib
 import os
-import pandas as pd
+import uuid
+import anyio
+import duckdb
 
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
 from pathlib import Path
-from storage.duck import get_schema, ingest_file, list_datasets, sql
+from storage.duck import (
+    dataset_table,
+    get_column_meta,
+    get_dataset,
+    get_missing_row_pct,
+    get_schema,
+    ingest_file,
+    list_datasets,
+    sql_arrow,
+)
+from ..cache import cached_response
+from ..concurrency import run_blocking
+from ..params import DatasetId
+from ..streaming import (
+    arrow_ndjson,
+    arrow_response,
+    ndjson_response,
+    wants_arrow,
+    wants_ndjson,
+)
 
 router = APIRouter()
 
 # Data directory
 DATA_PROC = Path("data/processed")
 DATA_PROC.mkdir(parents=True, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Utility Functions
 # ────────────────────────────────────────────────────────────────────────────────
 
 
+# ASCII code point -> itself if it is kept in identifiers, else "_"
+_ID_TRANS = {
+    i: chr(i) if chr(i).isalnum() or chr(i) == "_" else "_" for i in range(128)
+}
+
+
 def sanitize_id(name: str) -> str:
     """Sanitize dataset name for use as table identifier"""
+    if name.isascii():
+        return name.translate(_ID_TRANS)
+    # Non-ASCII letters and digits are kept too, which the table can't cover
     return "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
 
 
+async def _stream_upload(upload: UploadFile, path: Path) -> str:
+    """Write the upload to disk chunk by chunk; returns its BLAKE2b digest"""
+    digest = hashlib.blake2b(digest_size=16)
+    # anyio runs the file writes in worker threads so the event loop stays free
+    async with await anyio.open_file(path, "wb") as buffer:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            await buffer.write(chunk)
+    return digest.hexdigest()
+
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Dataset Management
 # ────────────────────────────────────────────────────────────────────────────────
@@ -46,12 +92,36 @@ async def upload_dataset(file: UploadFile = File(...)):
 
         file_path = DATA_PROC / f"{dataset_id}{Path(filename).suffix}"
 
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream to a temporary file so memory stays flat for large uploads
+        tmp_path = DATA_PROC / f".{dataset_id}.{uuid.uuid4().hex}.part"
+        try:
+            content_hash = await _stream_upload(file, tmp_path)
+
+            # Same bytes already ingested under this name: skip the re-parse
+            existing = await anyio.to_thread.run_sync(get_dataset, dataset_id)
+            if (
+                existing
+                and existing[1] == str(file_path)
+                and existing[5] == content_hash
+            ):
+                return {
+                    "success": True,
+                    "dataset_id": dataset_id,
+                    "table_name": f"ds_{dataset_id}",
+                    "path": existing[1],
+                    "n_rows": existing[2],
+                    "n_cols": existing[3],
+                    "message": f"{file.filename} is unchanged; reusing existing dataset",
+                }
 
-        # Ingest CSV directly into DuckDB
-        table_name, n_rows, n_cols = ingest_file(str(file_path), dataset_id)
+            os.replace(tmp_path, file_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        # Ingest CSV directly into DuckDB, off the event loop
+        table_name, n_rows, n_cols = await anyio.to_thread.run_sync(
+            ingest_file, str(file_path), dataset_id, content_hash
+        )
 
         return {
             "success": True,
@@ -63,8 +133,10 @@ async def upload_dataset(file: UploadFile = File(...)):
             "message": f"Successfully ingested {file.filename}",
         }
 
-    except pd.errors.ParserError as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse CSV: {str(e)}")
+    except HTTPException:
+        raise
+    except duckdb.InvalidInputException as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse file: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -83,6 +155,7 @@ def get_datasets():
                     "n_rows": row[2],
                     "n_cols": row[3],
                     "last_ingested": str(row[4]),
+                    "content_hash": row[5],
                 }
                 for row in datasets
             ],
@@ -94,17 +167,32 @@ def get_datasets():
 
 
 @router.get("/datasets/{dataset_id}/preview", tags=["Dataset Retrieval"])
-def preview_dataset(dataset_id: str, limit: int = Query(default=25, ge=1, le=500)):
-    """Preview first N rows of a dataset"""
+def preview_dataset(
+    dataset_id: DatasetId,
+    request: Request,
+    limit: int = Query(default=25, ge=1, le=500),
+):
+    """
+    Preview first N rows of a dataset
+    With Accept: application/x-ndjson, streams a {"columns": [...]} line then one
+    array line per row; with Accept: application/vnd.apache.arrow.stream,
+    returns the rows as an Arrow IPC stream
+    """
     try:
-        table_name = f"ds_{dataset_id}"
-        cols, rows = sql(f"SELECT * FROM {table_name} LIMIT {limit}")
+        table_name = dataset_table(dataset_id)
+        table = sql_arrow(f"SELECT * FROM {table_name} LIMIT ?", [limit])
+
+        if wants_arrow(request):
+            return arrow_response(table)
+        if wants_ndjson(request):
+            return ndjson_response(arrow_ndjson(table, {"columns": table.column_names}))
 
         return {
             "success": True,
-            "columns": cols,
-            "data": rows,
-            "rows_returned": len(rows),
+            "columns": table.column_names,
+            # Row arrays, aligned with "columns"
+            "data": [list(row) for row in zip(*table.to_pydict().values())],
+            "rows_returned": table.num_rows,
         }
     except Exception as e:
         raise HTTPException(
@@ -113,12 +201,36 @@ def preview_dataset(dataset_id: str, limit: int = Query(default=25, ge=1, le=500
 
 
 @router.get("/datasets/{dataset_id}/schema", tags=["Dataset Retrieval"])
-def get_dataset_schema(dataset_id: str):
+def get_dataset_schema(dataset_id: DatasetId):
     """Get schema information for a dataset"""
     try:
-        table_name = f"ds_{dataset_id}"
-        schema_df = get_schema(table_name)
+        table_name = dataset_table(dataset_id)
+        schema = get_schema(table_name)
 
-        return {"success": True, "schema": schema_df.to_dict(orient="records")}
+        return {"success": True, "schema": schema.to_pylist()}
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Failed to get schema: {str(e)}")
+
+
+@router.get("/datasets/{dataset_id}/columns", tags=["Dataset Retrieval"])
+def get_dataset_columns(dataset_id: DatasetId):
+    """Per-column metadata recorded at ingest, including numeric classification"""
+    try:
+        return {"success": True, "columns": list(get_column_meta(dataset_id))}
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Failed to get columns: {str(e)}")
+
+
+@router.get("/datasets/{dataset_id}/missing", tags=["Dataset Retrieval"])
+@cached_response("dataset_id")
+async def get_missing_pct(dataset_id: DatasetId):
+    """Percent of rows with at least one missing value"""
+    try:
+        table_name = dataset_table(dataset_id)
+        missing_pct = await run_blocking(get_missing_row_pct, table_name)
+
+        return {"success": True, "missing_pct": missing_pct}
+    except Exception as e:
+        raise HTTPException(
+            status_code=404, detail=f"Failed to compute missing rows: {str(e)}"
+        )
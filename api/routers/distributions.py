@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException, Query
 
+from ..cache import cached_response
+from ..concurrency import run_blocking
+from ..params import DatasetId
 from storage.duck import (
+    dataset_table,
     get_categorical_bias_metrics,
     get_numeric_bias_metrics,
     get_numeric_histogram,
@@ -13,20 +17,22 @@ router = APIRouter()
 # ────────────────────────────────────────────────────────────────────────────────
 # Distribution and Bias Endpoints
 # ────────────────────────────────────────────────────────────────────────────────
+# Not response-cached: the raw sample can run to 500,000 values, and the cache
+# is bounded by entry count, not bytes
 @router.get(
     "/datasets/{dataset_id}/distributions/numeric", tags=["Distribution Methods"]
 )
-def get_numeric_distribution(
-    dataset_id: str,
+async def get_numeric_distribution(
+    dataset_id: DatasetId,
     column: str,
     bins: int = Query(default=30, ge=5, le=80),
     sample_size: int = Query(default=100000, ge=1000, le=500000),
 ):
     """Get histogram and statistics for numeric column"""
     try:
-        table_name = f"ds_{dataset_id}"
-        hist_data, sample_data = get_numeric_histogram(
-            table_name, column, bins, sample_size
+        table_name = dataset_table(dataset_id)
+        hist_data, sample_data = await run_blocking(
+            get_numeric_histogram, table_name, column, bins, sample_size
         )
 
         if hist_data is None or sample_data is None:
@@ -34,10 +40,16 @@ def get_numeric_distribution(
                 status_code=404, detail="No data available for this column"
             )
 
+        # Records are zipped from ndarray.tolist() columns, without pandas
+        names = list(hist_data)
+        histogram = [
+            dict(zip(names, row))
+            for row in zip(*(values.tolist() for values in hist_data.values()))
+        ]
         return {
             "success": True,
-            "histogram": hist_data.to_dict(orient="records"),
-            "sample": sample_data.to_dict(orient="records"),
+            "histogram": histogram,
+            "sample": [{column: value} for value in sample_data.tolist()],
             "sample_size": len(sample_data),
         }
     except HTTPException:
@@ -51,15 +63,16 @@ def get_numeric_distribution(
 @router.get(
     "/datasets/{dataset_id}/distributions/categorical", tags=["Distribution Methods"]
 )
-def get_categorical_distribution(
-    dataset_id: str, column: str, top_k: int = Query(default=20, ge=5, le=50)
+@cached_response("dataset_id")
+async def get_categorical_distribution(
+    dataset_id: DatasetId, column: str, top_k: int = Query(default=20, ge=5, le=50)
 ):
     """Get value counts for categorical column"""
     try:
-        table_name = f"ds_{dataset_id}"
-        value_counts = get_value_counts(table_name, column, top_k)
+        table_name = dataset_table(dataset_id)
+        value_counts = await run_blocking(get_value_counts, table_name, column, top_k)
 
-        return {"success": True, "value_counts": value_counts.to_dict(orient="records")}
+        return {"success": True, "value_counts": value_counts.to_pylist()}
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to compute value counts: {str(e)}"
@@ -67,22 +80,20 @@ def get_categorical_distribution(
 
 
 @router.get("/datasets/{dataset_id}/bias/numeric", tags=["Bias Methods"])
-def get_numeric_bias(
-    dataset_id: str, column: str, bins: int = Query(default=30, ge=5, le=80)
+@cached_response("dataset_id")
+async def get_numeric_bias(
+    dataset_id: DatasetId, column: str, bins: int = Query(default=30, ge=5, le=80)
 ):
     """Get bias metrics for numeric column"""
     try:
-        table_name = f"ds_{dataset_id}"
-        metrics = get_numeric_bias_metrics(table_name, column, bins)
+        table_name = dataset_table(dataset_id)
+        metrics = await run_blocking(get_numeric_bias_metrics, table_name, column, bins)
 
         if metrics is None:
             raise HTTPException(
                 status_code=404, detail="Could not compute bias metrics for this column"
             )
 
-        # Convert DataFrame to dict for JSON serialization
-        metrics["bins_table"] = metrics["bins_table"].to_dict(orient="records")
-
         return {"success": True, "metrics": metrics}
     except HTTPException:
         raise
@@ -93,20 +104,18 @@ def get_numeric_bias(
 
 
 @router.get("/datasets/{dataset_id}/bias/categorical", tags=["Bias Methods"])
-def get_categorical_bias(dataset_id: str, column: str):
+@cached_response("dataset_id")
+async def get_categorical_bias(dataset_id: DatasetId, column: str):
     """Get bias metrics for categorical column"""
     try:
-        table_name = f"ds_{dataset_id}"
-        metrics = get_categorical_bias_metrics(table_name, column)
+        table_name = dataset_table(dataset_id)
+        metrics = await run_blocking(get_categorical_bias_metrics, table_name, column)
 
         if metrics is None:
             raise HTTPException(
                 status_code=404, detail="Could not compute bias metrics for this column"
             )
 
-        # Convert DataFrame to dict for JSON serialization
-        metrics["top_table"] = metrics["top_table"].to_dict(orient="records")
-
         return {"success": True, "metrics": metrics}
     except HTTPException:
         raise
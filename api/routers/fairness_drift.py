@@ -1,8 +1,23 @@
+import math
+from functools import partial
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query
 
-from storage.duck import connect
-from analytics.drift import compute_psi_table
+from storage.duck import (
+    COMPARISON_OPERATORS,
+    EXACT_QUANTILES,
+    dataset_table,
+    describe_table,
+    get_categorical_psi,
+    get_non_null_counts,
+    get_numeric_psi,
+    get_selection_rates,
+    is_numeric_type,
+)
+from analytics.drift import psi_record, sort_psi_records
+from ..cache import cached_response
+from ..concurrency import map_blocking, run_blocking
+from ..params import DatasetId
 
 router = APIRouter()
 
@@ -10,25 +25,18 @@ router = APIRouter()
 # ────────────────────────────────────────────────────────────────────────────────
 # Fairness & Drift Endpoints
 # ────────────────────────────────────────────────────────────────────────────────
-@router.get("/datasets/{dataset_id}/fairness", tags=["Fairness Calculation"])
-def compute_fairness_metrics(
+def _fairness_metrics(
     dataset_id: str,
     target_column: str,
     threshold: float,
-    comparison_operator: str = Query(default=">", regex="^(>|<=)$"),
-    sensitive_attribute: Optional[str] = None,
+    comparison_operator: str,
+    sensitive_attribute: Optional[str],
 ):
-    """
-    Compute demographic parity for fairness analysis
-    """
+    """Blocking body of the fairness endpoint"""
     try:
-        table_name = f"ds_{dataset_id}"
-        con = connect()
-
+        table_name = dataset_table(dataset_id)
         # Validate columns exist using DESCRIBE (no data load)
-        columns_query = f"DESCRIBE SELECT * FROM {table_name}"
-        columns_info = con.execute(columns_query).df()
-        available_cols = columns_info["column_name"].tolist()
+        available_cols = {name for name, _ in describe_table(table_name)}
 
         if target_column not in available_cols:
             raise HTTPException(
@@ -39,43 +47,42 @@ def compute_fairness_metrics(
                 status_code=400, detail=f"Column '{sensitive_attribute}' not found"
             )
 
+        # get_selection_rates rejects unknown operators too, but as a 500
+        if comparison_operator not in COMPARISON_OPERATORS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported comparison operator '{comparison_operator}'",
+            )
+
         # If no sensitive attribute, return overall selection rate
         if not sensitive_attribute:
-            overall_query = f"""
-                SELECT AVG(CASE WHEN "{target_column}" {comparison_operator} {threshold} THEN 1 ELSE 0 END) as selection_rate
-                FROM {table_name}
-            """
-            result = con.execute(overall_query).fetchone()
-            return {
-                "success": True,
-                "overall_selection_rate": float(result[0] if result else 0),
-            }
-
-        # Compute fairness metrics using SQL aggregation (no full table load)
-        fairness_query = f"""
-            SELECT 
-                "{sensitive_attribute}" as group,
-                AVG(CASE WHEN "{target_column}" {comparison_operator} {threshold} THEN 1 ELSE 0 END) as selection_rate,
-                COUNT(*) as n
-            FROM {table_name}
-            GROUP BY "{sensitive_attribute}"
-            ORDER BY selection_rate DESC
-        """
-
-        grp = con.execute(fairness_query).df()
-
-        if len(grp) == 0:
+            overall = get_selection_rates(
+                table_name, target_column, threshold, comparison_operator
+            )
+            rate = overall.column("selection_rate")[0].as_py()
+            return {"success": True, "overall_selection_rate": float(rate or 0)}
+
+        # One GROUP BY over the two columns; the result is one row per group,
+        # with the demographic parity difference computed alongside in SQL
+        grp = get_selection_rates(
+            table_name,
+            target_column,
+            threshold,
+            comparison_operator,
+            sensitive_attribute,
+        )
+
+        if grp.num_rows == 0:
             raise HTTPException(
                 status_code=404, detail="No data to compute fairness metrics"
             )
 
-        # Demographic parity difference
-        dp = float(grp["selection_rate"].max() - grp["selection_rate"].min())
+        dp = grp.column("parity_difference")[0].as_py()
 
         return {
             "success": True,
-            "demographic_parity_difference": dp,
-            "group_statistics": grp.to_dict(orient="records"),
+            "demographic_parity_difference": float(dp),
+            "group_statistics": grp.drop_columns("parity_difference").to_pylist(),
         }
 
     except HTTPException:
@@ -86,36 +93,34 @@ def compute_fairness_metrics(
         )
 
 
-@router.get("/datasets/{ref_id}/drift/{cur_id}", tags=["Drift Calculation"])
-def compute_drift_psi(
+def _drift_psi(
     ref_id: str,
     cur_id: str,
-    columns: Optional[List[str]] = Query(default=None),
-    n_bins: int = Query(default=10, ge=5, le=30),
+    columns: Optional[List[str]],
+    n_bins: int,
+    exact: Optional[bool],
 ):
-    """
-    Compute PSI (Population Stability Index) between reference and current datasets
-    """
+    """Blocking body of the drift endpoint"""
     try:
-        ref_table = f"ds_{ref_id}"
-        cur_table = f"ds_{cur_id}"
-        con = connect()
-
-        # Get shared columns from schema (no data fetch)
-        ref_cols_query = f"DESCRIBE SELECT * FROM {ref_table}"
-        cur_cols_query = f"DESCRIBE SELECT * FROM {cur_table}"
+        ref_table = dataset_table(ref_id)
+        cur_table = dataset_table(cur_id)
 
-        ref_cols = set(con.execute(ref_cols_query).df()["column_name"].tolist())
-        cur_cols = set(con.execute(cur_cols_query).df()["column_name"].tolist())
+        # Get shared columns and their types from schema (no data fetch)
+        ref_types = dict(describe_table(ref_table))
+        cur_types = dict(describe_table(cur_table))
+        ref_cols = set(ref_types)
+        cur_cols = set(cur_types)
 
         # Get shared columns
         if columns is None:
-            columns = list(ref_cols.intersection(cur_cols))
+            columns = [c for c in ref_types if c in cur_cols]
         else:
-            # Validate requested columns exist in both datasets
-            missing_ref = set(columns) - ref_cols
-            missing_cur = set(columns) - cur_cols
-            if missing_ref or missing_cur:
+            # Validate requested columns exist in both datasets; the missing
+            # sets are only built for the error message
+            requested = set(columns)
+            if not (requested <= ref_cols and requested <= cur_cols):
+                missing_ref = requested - ref_cols
+                missing_cur = requested - cur_cols
                 raise HTTPException(
                     status_code=400,
                     detail=f"Columns missing - ref: {missing_ref}, cur: {missing_cur}",
@@ -126,16 +131,44 @@ def compute_drift_psi(
                 status_code=400, detail="No shared columns between datasets"
             )
 
-        # Fetch ONLY the selected columns (not entire tables!)
-        cols_str = ", ".join([f'"{col}"' for col in columns])
-        ref_query = f"SELECT {cols_str} FROM {ref_table}"
-        cur_query = f"SELECT {cols_str} FROM {cur_table}"
-
-        ref_df = con.execute(ref_query).df()
-        cur_df = con.execute(cur_query).df()
+        # Binning, proportions and the PSI sum all run inside DuckDB
+        # The two tables are scanned independently, so their counts overlap
+        ref_n, cur_n = map_blocking(
+            partial(get_non_null_counts, cols=columns), [ref_table, cur_table]
+        )
 
-        # Compute PSI for each column
-        psi_results = compute_psi_table(ref_df, cur_df, columns, n_bins)
+        num_cols = {
+            c
+            for c in columns
+            if is_numeric_type(ref_types[c]) and is_numeric_type(cur_types[c])
+        }
+        cat_cols = [c for c in columns if c not in num_cols]
+        # Numeric columns with no values on either side get no PSI
+        binned = [c for c in columns if c in num_cols and ref_n[c] and cur_n[c]]
+
+        # One query covers every numeric column and one every categorical
+        # column; the two are independent, so they run concurrently
+        num_psi, cat_psi = map_blocking(
+            lambda run: run(),
+            [
+                partial(get_numeric_psi, ref_table, cur_table, binned, n_bins, exact),
+                partial(get_categorical_psi, ref_table, cur_table, cat_cols),
+            ],
+        )
+        psi = {**num_psi, **cat_psi}
+
+        psi_results = sort_psi_records(
+            [
+                psi_record(
+                    col,
+                    "numeric" if col in num_cols else "categorical",
+                    ref_n[col],
+                    cur_n[col],
+                    psi.get(col, math.nan),
+                )
+                for col in columns
+            ]
+        )
 
         return {
             "success": True,
@@ -151,3 +184,41 @@ def compute_drift_psi(
         raise HTTPException(
             status_code=500, detail=f"Failed to compute drift: {str(e)}"
         )
+
+
+@router.get("/datasets/{dataset_id}/fairness", tags=["Fairness Calculation"])
+@cached_response("dataset_id")
+async def compute_fairness_metrics(
+    dataset_id: DatasetId,
+    target_column: str,
+    threshold: float,
+    comparison_operator: str = Query(default=">", regex="^(>|<=)$"),
+    sensitive_attribute: Optional[str] = None,
+):
+    """
+    Compute demographic parity for fairness analysis
+    """
+    return await run_blocking(
+        _fairness_metrics,
+        dataset_id,
+        target_column,
+        threshold,
+        comparison_operator,
+        sensitive_attribute,
+    )
+
+
+@router.get("/datasets/{ref_id}/drift/{cur_id}", tags=["Drift Calculation"])
+@cached_response("ref_id", "cur_id")
+async def compute_drift_psi(
+    ref_id: DatasetId,
+    cur_id: DatasetId,
+    columns: Optional[List[str]] = Query(default=None),
+    n_bins: int = Query(default=10, ge=5, le=30),
+    # Defaulted here, not in get_numeric_psi, so the cache key holds the setting
+    exact: bool = EXACT_QUANTILES,
+):
+    """
+    Compute PSI (Population Stability Index) between reference and current datasets
+    """
+    return await run_blocking(_drift_psi, ref_id, cur_id, columns, n_bins, exact)
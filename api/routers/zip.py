@@ -2,16 +2,19 @@
 
 from __future__ import annotations
 
+import heapq
 import os
 import shutil
 import tempfile
 import time
 import uuid
 import zipfile
+from collections import Counter
 from pathlib import Path, PurePosixPath
 from threading import Lock
-from typing import Counter, Dict, List
+from typing import Dict, List, Tuple
 
+import anyio
 from fastapi import APIRouter, File, HTTPException, UploadFile
 from pydantic import BaseModel, Field
 
@@ -20,10 +23,12 @@ from storage.duck import ingest_combined_files
 router = APIRouter()
 
 SUPPORTED_SUFFIXES = (".csv", ".csv.gz", ".parquet")
-UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
 SESSION_TTL_SECONDS = 60 * 30
 
 _zip_sessions: Dict[str, Dict[str, object]] = {}
+# (created_at, zip_id), oldest first
+_expiry_heap: List[Tuple[float, str]] = []
 _session_lock = Lock()
 
 
@@ -34,8 +39,7 @@ class ZipIngestRequest(BaseModel):
 
 
 def _is_supported(filename: str) -> bool:
-    lower = filename.lower()
-    return any(lower.endswith(suffix) for suffix in SUPPORTED_SUFFIXES)
+    return filename.lower().endswith(SUPPORTED_SUFFIXES)
 
 
 def _sanitize_dataset_name(name: str) -> str:
@@ -45,20 +49,26 @@ def _sanitize_dataset_name(name: str) -> str:
     return sanitized.strip("_")
 
 
+def _copy_to_disk(src, path: Path) -> int:
+    with open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        return dst.tell()
+
+
 async def _write_upload_to_disk(upload: UploadFile, path: Path) -> int:
-    written = 0
-    with open(path, "wb") as buffer:
-        while True:
-            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
-            if not chunk:
-                break
-            buffer.write(chunk)
-            written += len(chunk)
-    return written
-
-
-def _extract_zip(archive: Path, extract_dir: Path) -> Dict[str, str]:
-    files: Dict[str, str] = {}
+    # The upload is already spooled by Starlette; copy its file object in one
+    # worker-thread call instead of awaiting every chunk on the event loop
+    await upload.seek(0)
+    return await anyio.to_thread.run_sync(_copy_to_disk, upload.file, path)
+
+
+def _list_zip(archive: Path, extract_dir: Path) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Read the archive's central directory without extracting anything.
+    Returns (supported name -> uncompressed size, skipped names).
+    """
+    files: Dict[str, int] = {}
+    skipped: List[str] = []
     base = extract_dir.resolve()
 
     with zipfile.ZipFile(archive) as zf:
@@ -78,24 +88,34 @@ def _extract_zip(archive: Path, extract_dir: Path) -> Dict[str, str]:
                     status_code=400, detail="ZIP file contains unsafe file paths"
                 )
 
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            with zf.open(member) as src, open(dest_path, "wb") as dst:
-                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+            if not _is_supported(member.filename):
+                skipped.append(relative.as_posix())
+                continue
+
+            files[relative.as_posix()] = member.file_size
 
-            files[relative.as_posix()] = str(dest_path)
+    return files, skipped
 
-    return files
+
+def _extract_members(archive: Path, names: List[str], extract_dir: Path) -> List[str]:
+    """Extract only the named members (already validated by _list_zip)"""
+    paths: List[str] = []
+    with zipfile.ZipFile(archive) as zf:
+        for name in names:
+            dest_path = extract_dir / Path(PurePosixPath(name))
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(name) as src, open(dest_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+            paths.append(str(dest_path))
+    return paths
 
 
 def _prune_sessions() -> None:
+    # Oldest sessions sit at the heap head, so only expired ones are visited;
+    # entries whose session was already ingested are simply dropped
     cutoff = time.time() - SESSION_TTL_SECONDS
-    expired: List[str] = []
-    for key, session in list(_zip_sessions.items()):
-        created = session.get("created_at")
-        if isinstance(created, (int, float)) and created < cutoff:
-            expired.append(key)
-
-    for key in expired:
+    while _expiry_heap and _expiry_heap[0][0] < cutoff:
+        _, key = heapq.heappop(_expiry_heap)
         session = _zip_sessions.pop(key, None)
         if not session:
             continue
@@ -108,6 +128,7 @@ def _store_session(zip_id: str, payload: Dict[str, object]) -> None:
     with _session_lock:
         _prune_sessions()
         _zip_sessions[zip_id] = payload
+        heapq.heappush(_expiry_heap, (payload["created_at"], zip_id))
 
 
 def _get_session(zip_id: str) -> Dict[str, object]:
@@ -150,18 +171,20 @@ async def upload_zip(file: UploadFile = File(...)):
         shutil.rmtree(base_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail="Uploaded ZIP file is empty")
 
+    # Members are only listed here; the ones the user selects are extracted at
+    # ingest time, so unselected files never hit the disk
     try:
-        files_map = _extract_zip(archive_path, extract_dir)
+        files_map, skipped_files = await anyio.to_thread.run_sync(
+            _list_zip, archive_path, extract_dir
+        )
     except HTTPException:
         shutil.rmtree(base_dir, ignore_errors=True)
         raise
     except zipfile.BadZipFile:
         shutil.rmtree(base_dir, ignore_errors=True)
         raise HTTPException(status_code=400, detail="Invalid ZIP file")
-    finally:
-        archive_path.unlink(missing_ok=True)
 
-    valid_files = [name for name in files_map if _is_supported(name)]
+    valid_files = list(files_map)
 
     if not valid_files:
         shutil.rmtree(base_dir, ignore_errors=True)
@@ -170,13 +193,11 @@ async def upload_zip(file: UploadFile = File(...)):
             detail="ZIP archive must include CSV, CSV.GZ, or Parquet files",
         )
 
-    # Count invalid files by suffix
-    invalid_files = [name for name in files_map if not _is_supported(name)]
-    invalid_suffix_counts = {}
-    for filename in invalid_files:
-        # Get the file extension (e.g., ".txt", ".jpg")
-        suffix = Path(filename).suffix.lower() or "(no extension)"
-        invalid_suffix_counts[suffix] = invalid_suffix_counts.get(suffix, 0) + 1
+    # Count invalid files by suffix (e.g., ".txt", ".jpg")
+    invalid_suffix_counts = Counter(
+        os.path.splitext(filename)[1].lower() or "(no extension)"
+        for filename in skipped_files
+    )
 
     zip_id = str(uuid.uuid4())
     dataset_hint = (
@@ -187,7 +208,10 @@ async def upload_zip(file: UploadFile = File(...)):
         zip_id,
         {
             "base_dir": str(base_dir),
+            "archive": str(archive_path),
+            "extract_dir": str(extract_dir),
             "files": files_map,
+            "skipped": skipped_files,
             "source_name": original_name,
             "suggested_dataset": dataset_hint,
             "created_at": time.time(),
@@ -211,8 +235,13 @@ def ingest_zip_contents(request: ZipIngestRequest):
             status_code=400, detail="At least one file must be selected"
         )
 
-    available_files: Dict[str, str] = session["files"]
-    missing = [name for name in selected if name not in available_files]
+    available_files: Dict[str, int] = session["files"]
+    skipped_files = set(session.get("skipped", ()))
+    missing = [
+        name
+        for name in selected
+        if name not in available_files and name not in skipped_files
+    ]
     if missing:
         raise HTTPException(
             status_code=400,
@@ -220,11 +249,10 @@ def ingest_zip_contents(request: ZipIngestRequest):
         )
 
     invalid_counts = Counter(
-        os.path.splitext(name)[1].lower()
+        os.path.splitext(name)[1].lower() or "(no extension)"
         for name in selected
         if not _is_supported(name)
     )
-    invalid_counts.pop("", None)
 
     if invalid_counts:
         raise HTTPException(
@@ -235,18 +263,11 @@ def ingest_zip_contents(request: ZipIngestRequest):
             ),
         )
 
-    file_paths = []
-    empty_files = []
-    for name in selected:
-        path = Path(available_files[name])
-        if not path.exists():
-            raise HTTPException(
-                status_code=400, detail=f"File missing on server: {name}"
-            )
-        if path.stat().st_size == 0:
-            empty_files.append(name)
-        file_paths.append(str(path))
+    archive_path = Path(session["archive"])
+    if not archive_path.exists():
+        raise HTTPException(status_code=400, detail="ZIP file missing on server")
 
+    empty_files = [name for name in selected if available_files[name] == 0]
     if empty_files:
         raise HTTPException(
             status_code=400,
@@ -261,6 +282,9 @@ def ingest_zip_contents(request: ZipIngestRequest):
     source_label = f"zip:{session['source_name']}::{','.join(selected)}"
 
     try:
+        file_paths = _extract_members(
+            archive_path, selected, Path(session["extract_dir"])
+        )
         table_name, n_rows, n_cols = ingest_combined_files(
             file_paths, dataset_id, source_label
         )
@@ -0,0 +1,57 @@
+"""
+Alternative response formats for large results: ndjson and Arrow IPC streams
+"""
+
+from typing import Any, Iterable, Iterator
+
+import orjson
+import pyarrow as pa
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for ndjson via its Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def wants_arrow(request: Request) -> bool:
+    """True when the client asked for an Arrow IPC stream via its Accept header"""
+    return ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_lines(header: dict, rows: Iterable[Any]) -> Iterator[bytes]:
+    """A header object line followed by one line per row"""
+    yield orjson.dumps(header, option=_ORJSON_OPTIONS) + b"\n"
+    for row in rows:
+        yield orjson.dumps(row, option=_ORJSON_OPTIONS) + b"\n"
+
+
+def arrow_ndjson(table: pa.Table, header: dict) -> Iterator[bytes]:
+    """
+    Stream an Arrow table as ndjson row arrays, one record batch at a time so
+    only a batch's worth of Python rows exists at once
+    """
+    yield orjson.dumps(header, option=_ORJSON_OPTIONS) + b"\n"
+    for batch in table.to_batches():
+        columns = (column.to_pylist() for column in batch.columns)
+        yield b"".join(
+            orjson.dumps(row, option=_ORJSON_OPTIONS) + b"\n" for row in zip(*columns)
+        )
+
+
+def ndjson_response(lines: Iterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
+def arrow_response(table: pa.Table) -> Response:
+    """Arrow IPC stream of the table; numbers go out as raw buffers, not text"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_STREAM_MEDIA_TYPE)
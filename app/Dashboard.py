@@ -375,17 +375,35 @@ body {
 </div>
 
 <script>
+// Size the iframe to the content instead of reserving a fixed height; the
+// frame is same-origin (srcdoc), so its element can be resized directly
+// (html/body are height: 100%, so the .container is what holds the content)
+if (window.frameElement) {
+  const content = document.querySelector('.container');
+  new ResizeObserver(() => {
+    window.frameElement.style.height = content.offsetHeight + 'px';
+  }).observe(content);
+}
+
+// page -> sidebar link, looked up once; rescanned if Streamlit re-rendered it
+const navLinks = {};
+
 function navigateTo(page) {
   try {
-    const parent = window.parent.document;
-    const sidebarLinks = parent.querySelectorAll('[data-testid="stSidebarNav"] a');
-    
-    for (const link of sidebarLinks) {
-      const href = link.getAttribute('href') || '';
-      if (href.includes(page)) {
-        link.click();
-        break;
+    let link = navLinks[page];
+    if (!link || !link.isConnected) {
+      const nav = window.parent.document.querySelector('[data-testid="stSidebarNav"]');
+      link = null;
+      for (const a of nav ? nav.getElementsByTagName('a') : []) {
+        if ((a.getAttribute('href') || '').includes(page)) {
+          link = a;
+          break;
+        }
       }
+      navLinks[page] = link;
+    }
+    if (link) {
+      link.click();
     }
   } catch (e) {
     console.warn('Navigation error:', e);
@@ -396,5 +414,6 @@ function navigateTo(page) {
 </html>
 """
 
-# Render the custom HTML
-components.html(html_content, height=1800, scrolling=True)
+# Render the custom HTML; the embedded script grows the frame to fit, so the
+# initial height only reserves space for the first paint
+components.html(html_content, height=900)
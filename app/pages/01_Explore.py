@@ -1,12 +1,21 @@
+import hashlib
 import os
 from pathlib import Path
 from typing import List
 
 import streamlit as st
 import pandas as pd
-import requests
-
-from utils import inject_css, kpi_grid, spinner
+import pyarrow as pa
+
+from utils import (
+    API_TIMEOUT,
+    UPLOAD_TIMEOUT,
+    api_session,
+    inject_css,
+    kpi_grid,
+    post_file,
+    spinner,
+)
 from config import API_BASE
 
 DATA_PROC = "data/processed"
@@ -29,6 +38,64 @@ flash = st.session_state.pop("flash", None)
 if flash:
     st.success(flash)
 
+
+# ───────────────────────────────
+# Cached API reads
+# ───────────────────────────────
+# The catalog has no version key to cache on, so it expires after a short TTL
+# and is cleared whenever this page ingests something
+@st.cache_data(show_spinner=False, ttl=30)
+def _fetch_datasets() -> list:
+    response = api_session().get(f"{API_BASE}/datasets", timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["datasets"]
+
+
+# Keyed on last_ingested, so a re-ingested dataset misses the cache while slider
+# and selectbox reruns reuse the previous responses. Failed requests raise and
+# are not cached.
+@st.cache_data(show_spinner=False)
+def _fetch_schema(dataset_id: str, last_ingested: str) -> list:
+    response = api_session().get(
+        f"{API_BASE}/datasets/{dataset_id}/schema", timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()["schema"]
+
+
+@st.cache_data(show_spinner=False)
+def _fetch_numeric_count(dataset_id: str, last_ingested: str) -> int:
+    # Columns are classified server-side from the metadata recorded at ingest
+    response = api_session().get(
+        f"{API_BASE}/datasets/{dataset_id}/columns", timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return sum(col["is_numeric"] for col in response.json()["columns"])
+
+
+@st.cache_data(show_spinner=False)
+def _fetch_missing_pct(dataset_id: str, last_ingested: str) -> float:
+    response = api_session().get(
+        f"{API_BASE}/datasets/{dataset_id}/missing", timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()["missing_pct"]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _fetch_preview(dataset_id: str, last_ingested: str, n: int) -> pa.Table:
+    # Arrow IPC stream: columns arrive as buffers and go to st.dataframe as-is,
+    # without building a Python object per cell
+    response = api_session().get(
+        f"{API_BASE}/datasets/{dataset_id}/preview",
+        params={"limit": n},
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+        timeout=API_TIMEOUT,
+    )
+    response.raise_for_status()
+    return pa.ipc.open_stream(response.content).read_all()
+
+
 # ───────────────────────────────
 # Upload or ingest datasets
 # ───────────────────────────────
@@ -40,12 +107,45 @@ uploaded = st.file_uploader(
 )
 
 
+def _find_unchanged(file):
+    """
+    Catalog entry for this exact upload (same dataset id, file type and
+    BLAKE2b digest as the API computes), so identical bytes are not re-sent
+    """
+    dataset_id = sanitize_id(os.path.splitext(file.name)[0])
+    suffix = Path(file.name).suffix.lower()
+    digest = hashlib.blake2b(file.getbuffer(), digest_size=16).hexdigest()
+    try:
+        response = api_session().get(f"{API_BASE}/datasets", timeout=API_TIMEOUT)
+        datasets = response.json()["datasets"]
+    except Exception:
+        return None
+    return next(
+        (
+            d
+            for d in datasets
+            if d["dataset_id"] == dataset_id
+            and d.get("content_hash") == digest
+            and d["path"].lower().endswith(suffix)
+        ),
+        None,
+    )
+
+
 def _upload_to_api(file):
     """Upload file to API"""
+    existing = _find_unchanged(file)
+    if existing:
+        return {
+            "dataset_id": existing["dataset_id"],
+            "table_name": f"ds_{existing['dataset_id']}",
+            "n_rows": existing["n_rows"],
+            "n_cols": existing["n_cols"],
+        }
+
     try:
         with spinner("Uploading and ingesting..."):
-            files = {"file": (file.name, file.getvalue(), file.type)}
-            response = requests.post(f"{API_BASE}/upload", files=files)
+            response = post_file(f"{API_BASE}/upload", file)
 
             if response.status_code != 200:
                 st.error(
@@ -63,14 +163,9 @@ def _upload_zip_to_api(file):
     """Initialize ZIP upload session via the API."""
     try:
         with spinner("Uploading ZIP and extracting..."):
-            files = {
-                "file": (
-                    file.name,
-                    file.getvalue(),
-                    file.type or "application/zip",
-                )
-            }
-            response = requests.post(f"{API_BASE}/upload_zip", files=files)
+            response = post_file(
+                f"{API_BASE}/upload_zip", file, file.type or "application/zip"
+            )
 
         if response.status_code != 200:
             detail = response.json().get("detail", "Unknown error")
@@ -92,7 +187,9 @@ def _ingest_zip_selection(zip_id: str, selected: List[str], dataset_name: str):
 
     try:
         with spinner("Ingesting selected files..."):
-            response = requests.post(f"{API_BASE}/ingest_zip_contents", json=payload)
+            response = api_session().post(
+                f"{API_BASE}/ingest_zip_contents", json=payload, timeout=UPLOAD_TIMEOUT
+            )
     except Exception as e:  # pragma: no cover - user feedback path
         st.error(f"ZIP ingestion failed: {e}")
         return
@@ -124,6 +221,7 @@ def _ingest_zip_selection(zip_id: str, selected: List[str], dataset_name: str):
     st.session_state["flash"] = (
         f"Ingested ZIP selection as `{target_label}` with {rows} rows."
     )
+    _fetch_datasets.clear()
     st.rerun()
 
 
@@ -144,6 +242,7 @@ if uploaded is not None:
             st.session_state["flash"] = (
                 f"Ingested **{dataset_id}** as `{table_name}` ({n_rows}×{n_cols})."
             )
+            _fetch_datasets.clear()
             st.rerun()
 
     elif suffix in {".zip"}:
@@ -226,14 +325,14 @@ if zip_session:
             st.session_state.pop("zip_dataset_name", None)
             st.rerun()
 
+
 # ───────────────────────────────
 # Datasets known to API
 # ───────────────────────────────
 st.subheader("Datasets")
 
 try:
-    response = requests.get(f"{API_BASE}/datasets")
-    datasets = response.json()["datasets"]
+    datasets = _fetch_datasets()
 except Exception as e:
     st.error(f"Failed to fetch datasets: {e}")
     st.stop()
@@ -286,34 +385,11 @@ if selected_data:
 # KPIs
 # ───────────────────────────────
 dataset_id = choice_display
+last_ingested = selected_data["last_ingested"] if selected_data else ""
 
 try:
-    # Get schema for KPIs
-    schema_response = requests.get(f"{API_BASE}/datasets/{dataset_id}/schema")
-    schema_data = schema_response.json()["schema"]
-
-    # Count numeric columns
-    num_cols = sum(
-        1
-        for col in schema_data
-        if any(
-            t in col["column_type"].upper()
-            for t in [
-                "INT",
-                "DECIMAL",
-                "DOUBLE",
-                "FLOAT",
-                "REAL",
-                "HUGEINT",
-                "SMALLINT",
-                "TINYINT",
-            ]
-        )
-    )
-
-    # Get preview for missing calculation (simplified - just show 0 for now)
-    # TODO: Add proper missing calculation to API
-    missing_pct = 0.0
+    num_cols = _fetch_numeric_count(dataset_id, last_ingested)
+    missing_pct = round(_fetch_missing_pct(dataset_id, last_ingested), 2)
 
     kpi_grid(
         {
@@ -326,35 +402,28 @@ try:
 except Exception as e:
     st.error(f"KPI render failed: {e}")
 
+
 # ---------- Preview ----------
-st.markdown("##### Preview")
-n = st.slider("Rows to preview", 10, 500, 25, key="preview_rows")
+# A fragment, so moving the slider reruns only this block, not the whole page
+@st.fragment
+def _preview(dataset_id: str, last_ingested: str):
+    st.markdown("##### Preview")
+    n = st.slider("Rows to preview", 10, 500, 25, key="preview_rows")
 
-try:
-    preview_response = requests.get(
-        f"{API_BASE}/datasets/{dataset_id}/preview", params={"limit": n}
-    )
+    try:
+        preview = _fetch_preview(dataset_id, last_ingested, n)
+        st.dataframe(preview, width="stretch")
+        st.caption(f"Showing first {preview.num_rows} rows")
+    except Exception as e:
+        st.error(f"Preview failed: {e}")
 
-    if preview_response.status_code == 200:
-        preview_data = preview_response.json()
-        df = pd.DataFrame(preview_data["data"], columns=preview_data["columns"])
-        st.dataframe(df, width="stretch")
-        st.caption(f"Showing first {len(df)} rows")
-    else:
-        st.error("Preview failed")
 
-except Exception as e:
-    st.error(f"Preview failed: {e}")
+_preview(dataset_id, last_ingested)
 
 # ---------- Schema ----------
 with st.expander("Schema", expanded=False):
     try:
-        schema_response = requests.get(f"{API_BASE}/datasets/{dataset_id}/schema")
-        if schema_response.status_code == 200:
-            schema = schema_response.json()["schema"]
-            schema_df = pd.DataFrame(schema)
-            st.dataframe(schema_df, width="stretch")
-        else:
-            st.error("Schema fetch failed")
+        schema_df = pd.DataFrame(_fetch_schema(dataset_id, last_ingested))
+        st.dataframe(schema_df, width="stretch")
     except Exception as e:
         st.error(f"Schema failed: {e}")
@@ -23,24 +23,15 @@ dataset_id = dataset_choice.replace("ds_", "")
 st.caption(f"📂 Active dataset: `{dataset_choice}`")
 
 # ───────────────────────────────
-# Get schema from API
+# Get column types from API
 # ───────────────────────────────
 try:
-    response = requests.get(f"{API_BASE}/datasets/{dataset_id}/schema")
-    schema_data = response.json()["schema"]
-
-    # Separate numeric and categorical columns
-    num_cols = [
-        col["column_name"]
-        for col in schema_data
-        if any(
-            t in col["column_type"].upper()
-            for t in ["INT", "DOUBLE", "FLOAT", "DECIMAL", "NUMERIC"]
-        )
-    ]
-    cat_cols = [
-        col["column_name"] for col in schema_data if col["column_name"] not in num_cols
-    ]
+    response = requests.get(f"{API_BASE}/datasets/{dataset_id}/columns")
+    columns = response.json()["columns"]
+
+    # Split on the numeric flag the API records at ingest
+    num_cols = [col["name"] for col in columns if col["is_numeric"]]
+    cat_cols = [col["name"] for col in columns if not col["is_numeric"]]
 
 except Exception as e:
     st.error(f"Failed to load schema: {e}")
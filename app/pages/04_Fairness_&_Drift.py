@@ -1,4 +1,5 @@
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import requests
 from config import API_BASE
@@ -16,35 +17,12 @@ st.caption(f"📂 Active dataset: `{dataset_choice}`")
 
 # Get column types from API
 try:
-    response = requests.get(f"{API_BASE}/datasets/{dataset_id}/schema")
-    schema_data = response.json()["schema"]
-
-    numeric_types = [
-        "BIGINT",
-        "INTEGER",
-        "DOUBLE",
-        "FLOAT",
-        "DECIMAL",
-        "HUGEINT",
-        "SMALLINT",
-        "TINYINT",
-        "UBIGINT",
-        "UINTEGER",
-        "USMALLINT",
-        "UTINYINT",
-        "REAL",
-    ]
-
-    num_cols = [
-        col["column_name"]
-        for col in schema_data
-        if col["column_type"].upper() in numeric_types
-    ]
-    cat_cols = [
-        col["column_name"]
-        for col in schema_data
-        if col["column_type"].upper() not in numeric_types
-    ]
+    response = requests.get(f"{API_BASE}/datasets/{dataset_id}/columns")
+    columns = response.json()["columns"]
+
+    # Split on the numeric flag the API records at ingest
+    num_cols = [col["name"] for col in columns if col["is_numeric"]]
+    cat_cols = [col["name"] for col in columns if not col["is_numeric"]]
 except Exception as e:
     st.error(f"Failed to load schema: {e}")
     st.stop()
@@ -63,12 +41,14 @@ with tab_fair:
     if num_cols and tcol:
         # Get median from API (could add dedicated endpoint, for now use preview)
         try:
-            preview_response = requests.get(f"{API_BASE}/datasets/{dataset_id}/preview")
-            preview_data = preview_response.json()
-            df_sample = pd.DataFrame(
-                preview_data["data"], columns=preview_data["columns"]
+            # Arrow IPC preview: only the target column is converted, not every cell
+            preview_response = requests.get(
+                f"{API_BASE}/datasets/{dataset_id}/preview",
+                headers={"Accept": "application/vnd.apache.arrow.stream"},
             )
-            median_val = df_sample[tcol].median()
+            preview_response.raise_for_status()
+            sample = pa.ipc.open_stream(preview_response.content).read_all()
+            median_val = sample.column(tcol).to_pandas().median()
         except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
             median_val = 0.0
 
@@ -1,5 +1,6 @@
 # app/utils.py
 import os
+import uuid
 import streamlit as st
 import pandas as pd
 from contextlib import contextmanager
@@ -23,12 +24,10 @@ def severity_badge(level: str) -> str:
 
 def dataset_selector(label="Select dataset"):
     """Shared dataset dropdown across all pages - uses API"""
-    import requests
-
     API_BASE = os.getenv("API_BASE_URL", "http://api:8000")
 
     try:
-        response = requests.get(f"{API_BASE}/datasets")
+        response = api_session().get(f"{API_BASE}/datasets", timeout=API_TIMEOUT)
         datasets = response.json()["datasets"]
         tables = ["ds_" + d["dataset_id"] for d in datasets]
     except Exception as e:
@@ -136,6 +135,82 @@ def load_parquet(path: str) -> pd.DataFrame:
     return pd.read_parquet(path)
 
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class _Replayable:
+    """
+    Streamed request body that restarts its generator on every iteration, so a
+    connection retry resends the whole body instead of an exhausted one
+    """
+
+    def __init__(self, make):
+        self._make = make
+
+    def __iter__(self):
+        return self._make()
+
+
+# (connect, read) timeouts for API calls; ingesting can take a while to answer
+API_TIMEOUT = (3, 30)
+UPLOAD_TIMEOUT = (3, 600)
+
+
+@st.cache_resource
+def api_session():
+    """
+    Process-wide keep-alive session for API calls, so reruns reuse pooled
+    connections; idempotent requests are retried briefly on connection errors
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # POST is left out: an upload that reached the API is never replayed
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.2,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def post_file(url: str, file, content_type: str | None = None):
+    """
+    POST an uploaded file as the multipart/form-data field "file", streaming it
+    in UPLOAD_CHUNK_SIZE pieces instead of building the whole body in memory
+    """
+    boundary = uuid.uuid4().hex
+    filename = file.name.replace('"', "%22")
+    content_type = content_type or file.type or "application/octet-stream"
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+
+    def body():
+        yield head
+        file.seek(0)
+        while chunk := file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    return api_session().post(
+        url,
+        data=_Replayable(body),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        timeout=UPLOAD_TIMEOUT,
+    )
+
+
 @contextmanager
 def spinner(msg: str):
     with st.spinner(msg):
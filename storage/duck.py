@@ -2,38 +2,139 @@
 import duckdb
 import pathlib
 import atexit
-from threading import Lock
-from typing import List
+import functools
+import json
+import math
+import os
+import queue
+import re
+import time
+import pyarrow as pa
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
 DB = pathlib.Path("data/duckdb/eda.duckdb")
 DB.parent.mkdir(parents=True, exist_ok=True)
 
+# Exact quantiles for drift binning instead of the approximate sketch
+EXACT_QUANTILES = os.getenv("EDA_EXACT_QUANTILES", "0") == "1"
+
+# Cursors handed out for concurrent read queries; DuckDB is insensitive to
+# more readers than cores, so cap the pool there
+CURSOR_POOL_SIZE = min(os.cpu_count() or 1, 8)
+
+# Bookkeeping tables that are not datasets
+CATALOG_TABLES = {"datasets", "meta_cache"}
+
+# Dataset ids are spliced into table names, so they must be plain identifiers
+# (letters, digits, underscore; what sanitize_id produces on upload)
+DATASET_ID_PATTERN = r"^\w+$"
+_DATASET_ID = re.compile(r"\w+")
+
+# Persisted endpoint results: larger payloads stay in the in-process LRU only,
+# and the table is pruned to the newest META_CACHE_MAX_BYTES within the max age
+META_CACHE_MAX_PAYLOAD = 256 * 1024
+META_CACHE_MAX_BYTES = 64 * 1024 * 1024
+META_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+# Pruning scans the whole table, so it runs once per this many inserts
+META_CACHE_PRUNE_EVERY = 64
+
 _conn = None
+_initialized = False
+# Serializes writes (catalog setup, ingest); reads use cursor()
 _lock = Lock()
+# Serializes meta_cache writes so they don't queue behind ingests on _lock
+# (ingest takes it after _lock when dropping a dataset's results)
+_cache_write_lock = Lock()
+_cache_inserts = 0
+_cursors: "queue.LifoQueue[duckdb.DuckDBPyConnection]" = queue.LifoQueue()
+_cursor_slots = BoundedSemaphore(CURSOR_POOL_SIZE)
+
+# Catalog and DESCRIBE results are polled by every page load; serve repeats
+# from memory for a few seconds. Ingest clears the cache, so the TTL only
+# bounds staleness from changes made outside this process.
+METADATA_TTL_SECONDS = 5.0
+
+_metadata: Dict[Tuple, Tuple[float, Any]] = {}
+_metadata_lock = Lock()
 
 
 def connect():
     """Return the shared DuckDB connection (thread-safe)."""
     global _conn
+    # Once open, skip the write lock so readers never wait behind an ingest
+    if _conn is not None:
+        return _conn
     with _lock:
         if _conn is None:
             _conn = duckdb.connect(str(DB))
     return _conn
 
 
+@contextmanager
+def cursor() -> Iterator[duckdb.DuckDBPyConnection]:
+    """Borrow a pooled cursor on the shared database; blocks while all are in use."""
+    with _cursor_slots:
+        try:
+            cur = _cursors.get_nowait()
+        except queue.Empty:
+            cur = connect().cursor()
+        try:
+            yield cur
+        finally:
+            _cursors.put(cur)
+
+
+def _ttl_cached(func: Callable) -> Callable:
+    """Memoize a metadata query per arguments for METADATA_TTL_SECONDS."""
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = (func.__name__, *args)
+        now = time.monotonic()
+        with _metadata_lock:
+            hit = _metadata.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        value = func(*args)
+        with _metadata_lock:
+            _metadata[key] = (now + METADATA_TTL_SECONDS, value)
+        return value
+
+    return wrapper
+
+
+def _invalidate_metadata():
+    with _metadata_lock:
+        _metadata.clear()
+
+
 @atexit.register
 def close_connection():
-    """Close DuckDB connection on exit."""
-    global _conn
+    """Close pooled cursors and the DuckDB connection on exit."""
+    global _conn, _initialized
     with _lock:
+        while True:
+            try:
+                _cursors.get_nowait().close()
+            except queue.Empty:
+                break
         if _conn is not None:
             _conn.close()
             _conn = None
+        _initialized = False
 
 
 def init_db():
+    """Create the catalog tables; later calls are no-ops once that succeeded."""
+    global _initialized
+    if _initialized:
+        return
     con = connect()
     with _lock:
+        if _initialized:
+            return
         con.execute(
             """
             CREATE TABLE IF NOT EXISTS datasets (
@@ -41,49 +142,115 @@ def init_db():
                 path TEXT NOT NULL,
                 n_rows BIGINT,
                 n_cols INTEGER,
-                last_ingested TIMESTAMP DEFAULT now()
+                last_ingested TIMESTAMP DEFAULT now(),
+                content_hash TEXT,
+                columns JSON
             );
         """
         )
+        # Databases created before content hashing / column metadata were added
+        con.execute("ALTER TABLE datasets ADD COLUMN IF NOT EXISTS content_hash TEXT")
+        con.execute("ALTER TABLE datasets ADD COLUMN IF NOT EXISTS columns JSON")
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS meta_cache (
+                endpoint TEXT,
+                params_hash TEXT,
+                dataset_ids TEXT[],
+                payload BLOB,
+                created_at TIMESTAMP DEFAULT now(),
+                PRIMARY KEY (endpoint, params_hash)
+            );
+        """
+        )
+        # Results left over from earlier runs may be past the age or size limit
+        with _cache_write_lock:
+            _prune_cached_results(con)
+        _initialized = True
 
 
-def table_name(dataset_id: str) -> str:
-    return "ds_" + "".join(
-        ch if ch.isalnum() or ch == "_" else "_" for ch in dataset_id
-    )
+def dataset_table(dataset_id: str) -> str:
+    """Table name of a dataset id; raises ValueError unless the id is a plain identifier."""
+    if not _DATASET_ID.fullmatch(dataset_id):
+        raise ValueError(f"Invalid dataset id '{dataset_id}'")
+    return f"ds_{dataset_id}"
 
 
-def ingest_file(file_path: str, dataset_id: str):
+def quote_ident(name: str) -> str:
+    """Quote a column name for interpolation into SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _profile_table(con, tbl: str):
+    """
+    Row count, column count and JSON column metadata of a freshly ingested table;
+    the row count and approximate distinct counts share one scan.
+    """
+    described = con.execute(f"DESCRIBE SELECT * FROM {tbl}").fetchall()
+    aggregates = ["COUNT(*)"] + [
+        f"approx_count_distinct({quote_ident(row[0])})" for row in described
+    ]
+    n_rows, *distinct = con.execute(
+        f"SELECT {', '.join(aggregates)} FROM {tbl}"
+    ).fetchone()
+    columns = [
+        {
+            "name": name,
+            "duckdb_type": column_type,
+            "is_numeric": is_numeric_type(column_type),
+            "is_categorical": not is_numeric_type(column_type),
+            "n_distinct_approx": n_distinct,
+        }
+        for (name, column_type, *_), n_distinct in zip(described, distinct)
+    ]
+    return n_rows, len(described), json.dumps(columns)
+
+
+def _drop_cached_results(con, dataset_id: str):
+    """Forget cached endpoint results that read this dataset (caller holds _lock)."""
+    with _cache_write_lock:
+        con.execute(
+            "DELETE FROM meta_cache WHERE list_contains(dataset_ids, ?)", [dataset_id]
+        )
+
+
+def ingest_file(file_path: str, dataset_id: str, content_hash: str | None = None):
     """Ingest CSV/Parquet directly with thread safety."""
     init_db()
     con = connect()
-    tbl = table_name(dataset_id)
+    tbl = dataset_table(dataset_id)
 
     with _lock:
+        # DuckDB's parallel CSV/Parquet readers load the file in one pass;
+        # the path is bound as a parameter rather than spliced into the SQL
         if file_path.endswith(".csv"):
             con.execute(
-                f"CREATE OR REPLACE TABLE {tbl} AS SELECT * FROM read_csv_auto('{file_path}', sample_size=-1)"
+                f"CREATE OR REPLACE TABLE {tbl} AS SELECT * FROM read_csv_auto(?, sample_size=-1)",
+                [file_path],
             )
         elif file_path.endswith(".parquet"):
             con.execute(
-                f"CREATE OR REPLACE TABLE {tbl} AS SELECT * FROM read_parquet('{file_path}')"
+                f"CREATE OR REPLACE TABLE {tbl} AS SELECT * FROM read_parquet(?)",
+                [file_path],
             )
 
-        n_rows = con.execute(f"SELECT COUNT(*) FROM {tbl}").fetchone()
-        n_rows = n_rows[0] if n_rows else 0
-        n_cols = len(con.execute(f"SELECT * FROM {tbl} LIMIT 0").description or [])
+        n_rows, n_cols, columns = _profile_table(con, tbl)
         con.execute(
             """
-            INSERT INTO datasets(dataset_id, path, n_rows, n_cols, last_ingested)
-            VALUES (?, ?, ?, ?, now())
+            INSERT INTO datasets(dataset_id, path, n_rows, n_cols, last_ingested, content_hash, columns)
+            VALUES (?, ?, ?, ?, now(), ?, ?)
             ON CONFLICT(dataset_id) DO UPDATE SET
                 path = excluded.path,
                 n_rows = excluded.n_rows,
                 n_cols = excluded.n_cols,
-                last_ingested = now();
+                last_ingested = now(),
+                content_hash = excluded.content_hash,
+                columns = excluded.columns;
         """,
-            [dataset_id, file_path, n_rows, n_cols],
+            [dataset_id, file_path, n_rows, n_cols, content_hash, columns],
         )
+        _drop_cached_results(con, dataset_id)
+        _invalidate_metadata()
 
     return tbl, n_rows, n_cols
 
@@ -97,18 +264,16 @@ def ingest_combined_files(
 
     init_db()
     con = connect()
-    tbl = table_name(dataset_id)
+    tbl = dataset_table(dataset_id)
     select_statements = []
 
+    # One placeholder per file; the paths are bound in order, not spliced in
     for path in file_paths:
-        escaped = path.replace("'", "''")
         lower = path.lower()
         if lower.endswith(".csv") or lower.endswith(".csv.gz"):
-            select_statements.append(
-                f"SELECT * FROM read_csv_auto('{escaped}', sample_size=-1)"
-            )
+            select_statements.append("SELECT * FROM read_csv_auto(?, sample_size=-1)")
         elif lower.endswith(".parquet"):
-            select_statements.append(f"SELECT * FROM read_parquet('{escaped}')")
+            select_statements.append("SELECT * FROM read_parquet(?)")
         else:
             raise ValueError(f"Unsupported file type: {path}")
 
@@ -121,240 +286,369 @@ def ingest_combined_files(
     label = source_label or ";".join(file_paths)
 
     with _lock:
-        con.execute(f"CREATE OR REPLACE TABLE {tbl} AS {combined_select}")
-        n_rows = con.execute(f"SELECT COUNT(*) FROM {tbl}").fetchone()
-        n_rows = n_rows[0] if n_rows else 0
-        n_cols = len(con.execute(f"SELECT * FROM {tbl} LIMIT 0").description or [])
+        con.execute(f"CREATE OR REPLACE TABLE {tbl} AS {combined_select}", file_paths)
+        n_rows, n_cols, columns = _profile_table(con, tbl)
         con.execute(
             """
-            INSERT INTO datasets(dataset_id, path, n_rows, n_cols, last_ingested)
-            VALUES (?, ?, ?, ?, now())
+            INSERT INTO datasets(dataset_id, path, n_rows, n_cols, last_ingested, content_hash, columns)
+            VALUES (?, ?, ?, ?, now(), NULL, ?)
             ON CONFLICT(dataset_id) DO UPDATE SET
                 path = excluded.path,
                 n_rows = excluded.n_rows,
                 n_cols = excluded.n_cols,
-                last_ingested = now();
+                last_ingested = now(),
+                content_hash = NULL,
+                columns = excluded.columns;
         """,
-            [dataset_id, label, n_rows, n_cols],
+            [dataset_id, label, n_rows, n_cols, columns],
         )
+        _drop_cached_results(con, dataset_id)
+        _invalidate_metadata()
 
     return tbl, n_rows, n_cols
 
 
+@_ttl_cached
 def list_datasets():
-    """List datasets using shared connection."""
+    """List datasets on a pooled cursor."""
     init_db()
-    con = connect()
-    with _lock:
+    with cursor() as con:
         rows = con.execute(
             """
-            SELECT dataset_id, path, n_rows, n_cols, last_ingested
+            SELECT dataset_id, path, n_rows, n_cols, last_ingested, content_hash
             FROM datasets
             ORDER BY dataset_id
         """
         ).fetchall()
-    return rows
+    return tuple(rows)
 
 
-def load_dataset(dataset_id: str):
-    """Safely load a dataset by ID."""
-    tbl = table_name(dataset_id)
-    con = connect()
+def get_dataset(dataset_id: str):
+    """Catalog row for one dataset, or None if it was never ingested."""
+    init_db()
+    with cursor() as con:
+        return con.execute(
+            """
+            SELECT dataset_id, path, n_rows, n_cols, last_ingested, content_hash
+            FROM datasets
+            WHERE dataset_id = ?
+        """,
+            [dataset_id],
+        ).fetchone()
 
+
+def dataset_version(dataset_id: str):
+    """last_ingested timestamp of a dataset (None if unknown); changes on re-ingest."""
+    try:
+        with cursor() as con:
+            row = con.execute(
+                "SELECT last_ingested FROM datasets WHERE dataset_id = ?",
+                [dataset_id],
+            ).fetchone()
+    except duckdb.CatalogException:
+        return None  # catalog table not created yet
+    return row[0] if row else None
+
+
+def get_cached_result(endpoint: str, params_hash: str) -> bytes | None:
+    """Stored payload of an earlier endpoint result, or None."""
     try:
-        with _lock:
-            df = con.execute(f"SELECT * FROM {tbl}").df()
-        return df
-    except Exception as e:
-        raise ValueError(f"Failed to load dataset '{dataset_id}': {e}")
+        with cursor() as con:
+            row = con.execute(
+                "SELECT payload FROM meta_cache WHERE endpoint = ? AND params_hash = ?",
+                [endpoint, params_hash],
+            ).fetchone()
+    except duckdb.CatalogException:
+        return None  # catalog tables not created yet
+    return row[0] if row else None
+
+
+def _prune_cached_results(con):
+    """Drop results past the max age, then the oldest beyond the byte budget."""
+    con.execute(
+        """
+        DELETE FROM meta_cache
+        WHERE created_at < now() - to_seconds(?)
+           OR (endpoint, params_hash) IN (
+                SELECT endpoint, params_hash
+                FROM (
+                    SELECT
+                        endpoint,
+                        params_hash,
+                        SUM(octet_length(payload)) OVER (ORDER BY created_at DESC) AS kept
+                    FROM meta_cache
+                )
+                WHERE kept > ?
+            )
+    """,
+        [META_CACHE_MAX_AGE_SECONDS, META_CACHE_MAX_BYTES],
+    )
+
+
+def put_cached_result(
+    endpoint: str, params_hash: str, dataset_ids: List[str], payload: bytes
+):
+    """
+    Store an endpoint result until one of its datasets is re-ingested or it ages
+    out; payloads over META_CACHE_MAX_PAYLOAD are not stored.
+    """
+    global _cache_inserts
+    if len(payload) > META_CACHE_MAX_PAYLOAD:
+        return
+    init_db()
+    with cursor() as con, _cache_write_lock:
+        con.execute(
+            """
+            INSERT OR REPLACE INTO meta_cache(endpoint, params_hash, dataset_ids, payload)
+            VALUES (?, ?, ?, ?)
+        """,
+            [endpoint, params_hash, dataset_ids, payload],
+        )
+        _cache_inserts += 1
+        if _cache_inserts % META_CACHE_PRUNE_EVERY == 0:
+            _prune_cached_results(con)
 
 
 def sql(q: str):
-    """Execute SQL query with locking."""
-    con = connect()
-    with _lock:
+    """Execute SQL query on a pooled cursor."""
+    with cursor() as con:
         res = con.execute(q)
         cols = [d[0] for d in (res.description or [])]
         rows = res.fetchall()
     return cols, rows
 
 
+def sql_arrow(q: str, params: list | None = None) -> pa.Table:
+    """Execute SQL query on a pooled cursor; result as an Arrow table."""
+    with cursor() as con:
+        return con.execute(q, params).fetch_arrow_table()
+
+
 # ───────────────────────────────
 # Cached helpers distributions
 # ───────────────────────────────
-def load_table(table_name):
-    """Load entire table as DataFrame."""
-    con = connect()
-    with _lock:
-        return con.execute(f"SELECT * FROM {table_name}").df()
-
-
+@_ttl_cached
 def get_tables():
-    con = connect()
-    return [t[0] for t in con.execute("SHOW TABLES").fetchall() if t[0] != "datasets"]
+    with cursor() as con:
+        rows = con.execute("SHOW TABLES").fetchall()
+    return tuple(t[0] for t in rows if t[0] not in CATALOG_TABLES)
 
 
-def get_schema(table_name):
-    con = connect()
-    return con.execute(f"DESCRIBE SELECT * FROM {table_name} LIMIT 0").df()
+@_ttl_cached
+def get_column_meta(dataset_id: str) -> Tuple[dict, ...]:
+    """
+    Per-column metadata recorded at ingest: name, duckdb_type, is_numeric,
+    is_categorical, n_distinct_approx. Datasets ingested before it was recorded
+    fall back to DESCRIBE, without distinct counts.
+    """
+    with cursor() as con:
+        row = con.execute(
+            "SELECT columns FROM datasets WHERE dataset_id = ?", [dataset_id]
+        ).fetchone()
+    if row and row[0] is not None:
+        return tuple(json.loads(row[0]))
+    return tuple(
+        {
+            "name": name,
+            "duckdb_type": column_type,
+            "is_numeric": is_numeric_type(column_type),
+            "is_categorical": not is_numeric_type(column_type),
+            "n_distinct_approx": None,
+        }
+        for name, column_type in describe_table(dataset_table(dataset_id))
+    )
 
 
-def get_numeric_histogram(table_name, col, bins, sample_size=100000):
-    """Get histogram + sample data for numeric columns"""
-    con = connect()
-    stats = con.execute(
-        f"""
-        SELECT 
-            MIN("{col}") AS min_val,
-            MAX("{col}") AS max_val,
-            COUNT(*) AS total_count
-        FROM {table_name}
-        WHERE "{col}" IS NOT NULL
-    """
-    ).fetchone()
+@_ttl_cached
+def describe_table(table_name: str) -> Tuple[Tuple[str, str], ...]:
+    """(column_name, column_type) per column, from DESCRIBE (no data load)."""
+    with cursor() as con:
+        rows = con.execute(f"DESCRIBE SELECT * FROM {table_name}").fetchall()
+    return tuple((row[0], row[1]) for row in rows)
 
-    min_val, max_val, total_count = stats if stats else (None, None, 0)
-    if min_val is None or max_val is None or bins <= 0:
-        return None, None
 
-    bin_width = (max_val - min_val) / bins if bins else 0
-    if bin_width == 0:
-        return None, None
+def get_schema(table_name) -> pa.Table:
+    with cursor() as con:
+        return con.execute(
+            f"DESCRIBE SELECT * FROM {table_name} LIMIT 0"
+        ).fetch_arrow_table()
 
-    hist_data = con.execute(
-        f"""
-        SELECT 
-            FLOOR(("{col}" - {min_val}) / {bin_width}) AS bin_num,
-            {min_val} + FLOOR(("{col}" - {min_val}) / {bin_width}) * {bin_width} AS bin_start,
-            COUNT(*) AS count
-        FROM {table_name}
-        WHERE "{col}" IS NOT NULL
-        GROUP BY bin_num
-        ORDER BY bin_num
+
+def get_missing_row_pct(table_name: str) -> float:
     """
-    ).df()
+    Percent of rows with at least one NULL. COLUMNS(*) in WHERE expands to an
+    AND over every column, so the SQL stays the same size for wide tables.
+    """
+    with cursor() as con:
+        complete, total = con.execute(
+            f"""
+            SELECT
+                (SELECT COUNT(*) FROM {table_name} WHERE COLUMNS(*) IS NOT NULL),
+                COUNT(*)
+            FROM {table_name}
+            """
+        ).fetchone()
+    return 100.0 * (total - complete) / total if total else 0.0
 
-    sample_data = con.execute(
-        f"""
-        SELECT "{col}"
-        FROM {table_name}
-        WHERE "{col}" IS NOT NULL
-        USING SAMPLE {min(sample_size, total_count)} ROWS
+
+def get_numeric_histogram(table_name, col, bins, sample_size=100000):
     """
-    ).df()
+    Histogram as NumPy columns (bin_num, bin_start, count) plus a NumPy array of
+    sampled values for numeric columns
+    """
+    c = quote_ident(col)
+    with cursor() as con:
+        stats = con.execute(
+            f"""
+            SELECT 
+                MIN({c}) AS min_val,
+                MAX({c}) AS max_val,
+                COUNT(*) AS total_count
+            FROM {table_name}
+            WHERE {c} IS NOT NULL
+        """
+        ).fetchone()
 
-    return (
-        (hist_data, sample_data)
-        if hist_data is not None and sample_data is not None
-        else (None, None)
-    )
+        min_val, max_val, total_count = stats if stats else (None, None, 0)
+        if min_val is None or max_val is None or bins <= 0:
+            return None, None
+
+        bin_width = (max_val - min_val) / bins if bins else 0
+        if bin_width == 0:
+            return None, None
+
+        # Only identifiers are interpolated; the bin range is bound
+        hist_data = con.execute(
+            f"""
+            SELECT 
+                FLOOR(({c} - $lo) / $width) AS bin_num,
+                $lo + FLOOR(({c} - $lo) / $width) * $width AS bin_start,
+                COUNT(*) AS count
+            FROM {table_name}
+            WHERE {c} IS NOT NULL
+            GROUP BY bin_num
+            ORDER BY bin_num
+        """,
+            {"lo": float(min_val), "width": float(bin_width)},
+        ).fetchnumpy()
+
+        # Non-null values only, so the array comes back unmasked
+        sample_data = con.execute(
+            f"""
+            SELECT {c} AS v
+            FROM {table_name}
+            WHERE {c} IS NOT NULL
+            USING SAMPLE {int(min(sample_size, total_count))} ROWS
+        """
+        ).fetchnumpy()["v"]
+
+    return dict(hist_data), sample_data
 
 
 def get_value_counts(table_name, col, top_k):
-    """Get categorical value counts"""
-    con = connect()
+    """Get categorical value counts as an Arrow table"""
+    c = quote_ident(col)
     query = f"""
         SELECT 
-            COALESCE(CAST("{col}" AS VARCHAR), '<NA>') AS "{col}",
+            COALESCE(CAST({c} AS VARCHAR), '<NA>') AS {c},
             COUNT(*) AS count
         FROM {table_name}
-        GROUP BY "{col}"
+        GROUP BY {c}
         ORDER BY count DESC
-        LIMIT {top_k}
+        LIMIT ?
     """
-    return con.execute(query).df()
+    with cursor() as con:
+        return con.execute(query, [top_k]).fetch_arrow_table()
 
 
 def get_numeric_bias_metrics(table_name: str, col: str, bins: int) -> dict | None:
-    """Compute numeric bias metrics - all queries locked together."""
-    con = connect()
-
-    with _lock:  # ← One lock for the entire operation
-        # Get all numeric stats in one query
-        stats_query = f"""
-            WITH stats AS (
-                SELECT 
-                    COUNT(*) as total_rows,
-                    COUNT("{col}") as non_null_count,
-                    SKEWNESS("{col}") as skew_val,
-                    PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY "{col}") as q1,
-                    PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY "{col}") as q3,
-                    MIN("{col}") as min_val,
-                    MAX("{col}") as max_val,
-                    SUM(CASE WHEN "{col}" = 0 THEN 1 ELSE 0 END) as zero_count,
-                    SUM(CASE WHEN "{col}" IS NULL THEN 1 ELSE 0 END) as null_count
-                FROM {table_name}
-            )
-            SELECT * FROM stats
-        """
-
-        stats = con.execute(stats_query).fetchone()
-        if not stats or stats[0] == 0:
-            return None
-
-        (
+    """
+    Compute numeric bias metrics in one query: the summary stats, the IQR
+    outlier count and the top-10 equal-width bins all come back in one row.
+    """
+    c = quote_ident(col)
+    query = f"""
+        WITH base AS (
+            SELECT {c} AS v FROM {table_name}
+        ),
+        stats AS (
+            SELECT
+                COUNT(*) AS total_rows,
+                COUNT(v) AS non_null_count,
+                SKEWNESS(v) AS skew_val,
+                PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY v) AS q1,
+                PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY v) AS q3,
+                MIN(v) AS min_val,
+                MAX(v) AS max_val,
+                COUNT(*) FILTER (WHERE v = 0) AS zero_count,
+                COUNT(*) FILTER (WHERE v IS NULL) AS null_count
+            FROM base
+        ),
+        bounds AS (
+            SELECT *, q3 - q1 AS iqr, (max_val - min_val) / ? AS bin_width
+            FROM stats
+        ),
+        binned AS (
+            SELECT
+                FLOOR((v - min_val) / bin_width) AS bin_num,
+                min_val + FLOOR((v - min_val) / bin_width) * bin_width AS bin_start,
+                CASE
+                    WHEN bin_width > 0 THEN printf(
+                        '[%.2f, %.2f)', bin_start::DOUBLE, (bin_start + bin_width)::DOUBLE
+                    )
+                    -- constant column: a single bin holding the one value
+                    ELSE printf('[%.2f, %.2f]', min_val::DOUBLE, max_val::DOUBLE)
+                END AS bin,
+                COUNT(*) AS count,
+                COUNT(*) FILTER (
+                    WHERE iqr > 0 AND (v < q1 - 1.5 * iqr OR v > q3 + 1.5 * iqr)
+                ) AS outliers
+            FROM base, bounds
+            WHERE v IS NOT NULL
+            GROUP BY ALL
+        )
+        SELECT
             total_rows,
             non_null_count,
             skew_val,
-            q1,
-            q3,
             min_val,
             max_val,
             zero_count,
             null_count,
-        ) = stats
-
-        if min_val is None or max_val is None:
-            return None
-
-        # Calculate outliers using IQR
-        iqr = q3 - q1
-        if iqr > 0:
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            outlier_query = f"""
-                SELECT COUNT(*) as outlier_count
-                FROM {table_name}
-                WHERE "{col}" IS NOT NULL 
-                  AND ("{col}" < {lower_bound} OR "{col}" > {upper_bound})
-            """
-            result = con.execute(outlier_query).fetchone()
-
-            outlier_count = result[0] if result else 0
-            outlier_frac = outlier_count / non_null_count if non_null_count > 0 else 0.0
-        else:
-            outlier_frac = 0.0
-
-        # Get bin distribution
-        bin_width = (max_val - min_val) / bins
-        bin_query = f"""
-            WITH binned AS (
-                SELECT 
-                    FLOOR(("{col}" - {min_val}) / {bin_width}) as bin_num,
-                    {min_val} + FLOOR(("{col}" - {min_val}) / {bin_width}) * {bin_width} as bin_start,
-                    COUNT(*) as count
-                FROM {table_name}
-                WHERE "{col}" IS NOT NULL
-                GROUP BY bin_num
-            )
-            SELECT 
-                bin_start,
-                count,
-                CAST(count AS DOUBLE) / {non_null_count} as share
-            FROM binned
-            ORDER BY share DESC
-            LIMIT 10
-        """
-        bins_df = con.execute(bin_query).df()
-        max_bin_share = float(bins_df["share"].max()) if not bins_df.empty else 0.0
-
-        # Format bins table
-        bins_df["bin"] = bins_df["bin_start"].apply(
-            lambda x: f"[{x:.2f}, {x + bin_width:.2f})"
-        )
-        bins_table = bins_df[["bin", "share"]].copy()
+            (SELECT COALESCE(SUM(outliers), 0) FROM binned) AS outlier_count,
+            (
+                SELECT LIST({{'bin': bin, 'count': count}} ORDER BY count DESC)
+                FROM binned
+            )[1:10] AS top_bins
+        FROM bounds
+    """
+    with cursor() as con:
+        row = con.execute(query, [bins]).fetchone()
+
+    if not row or row[0] == 0:
+        return None
+
+    (
+        total_rows,
+        non_null_count,
+        skew_val,
+        min_val,
+        max_val,
+        zero_count,
+        null_count,
+        outlier_count,
+        top_bins,
+    ) = row
+
+    if min_val is None or max_val is None:
+        return None
+
+    outlier_frac = outlier_count / non_null_count if non_null_count > 0 else 0.0
+    bins_table = [
+        {"bin": b["bin"], "share": b["count"] / non_null_count} for b in top_bins or ()
+    ]
+    max_bin_share = bins_table[0]["share"] if bins_table else 0.0
 
-    # Processing outside lock (no DB access)
     zero_share = zero_count / total_rows
     missing_share = null_count / total_rows
 
@@ -390,74 +684,64 @@ def get_numeric_bias_metrics(table_name: str, col: str, bins: int) -> dict | Non
 
 
 def get_categorical_bias_metrics(table_name: str, col: str) -> dict | None:
-    """Compute categorical bias metrics - all queries locked together."""
-    import numpy as np
+    """
+    Compute categorical bias metrics in one query: a single GROUP BY feeds the
+    totals, the entropy and the top-20 value table.
+    """
+    c = quote_ident(col)
+    query = f"""
+        WITH value_counts AS (
+            SELECT
+                COALESCE(CAST({c} AS VARCHAR), '<NA>') AS value,
+                {c} IS NULL AS is_null,
+                COUNT(*) AS count
+            FROM {table_name}
+            GROUP BY {c}
+        ),
+        totals AS (
+            SELECT
+                SUM(count) AS total_rows,
+                COALESCE(SUM(count) FILTER (WHERE is_null), 0) AS null_count,
+                COUNT(*) AS observed_k
+            FROM value_counts
+        )
+        SELECT
+            total_rows,
+            null_count,
+            observed_k,
+            (
+                SELECT SUM(-(count / total_rows) * LN(count / total_rows))
+                FROM value_counts
+            ) AS entropy,
+            (
+                SELECT LIST(
+                    {{'value': value, 'count': count, 'share': count / total_rows}}
+                    ORDER BY count DESC
+                )
+                FROM value_counts
+            )[1:20] AS top_table
+        FROM totals
+    """
+    with cursor() as con:
+        row = con.execute(query).fetchone()
 
-    con = connect()
+    if not row or not row[0]:
+        return None
 
-    with _lock:  # ← One lock for all queries
-        # Get value counts with NULL handling
-        query = f"""
-            WITH value_counts AS (
-                SELECT 
-                    COALESCE(CAST("{col}" AS VARCHAR), '<NA>') as value,
-                    COUNT(*) as count
-                FROM {table_name}
-                GROUP BY "{col}"
-            ),
-            totals AS (
-                SELECT 
-                    COUNT(*) as total_rows,
-                    SUM(CASE WHEN "{col}" IS NULL THEN 1 ELSE 0 END) as null_count
-                FROM {table_name}
-            )
-            SELECT 
-                v.value,
-                v.count,
-                CAST(v.count AS DOUBLE) / t.total_rows as share,
-                t.total_rows,
-                t.null_count
-            FROM value_counts v
-            CROSS JOIN totals t
-            ORDER BY v.count DESC
-            LIMIT 20
-        """
-        result_df = con.execute(query).df()
-        if result_df.empty:
-            return None
-
-        total_rows = int(result_df["total_rows"].iloc[0])
-        null_count = int(result_df["null_count"].iloc[0])
-
-        # Calculate entropy
-        entropy_query = f"""
-            WITH value_shares AS (
-                SELECT 
-                    CAST(COUNT(*) AS DOUBLE) / (SELECT COUNT(*) FROM {table_name}) as p
-                FROM {table_name}
-                GROUP BY "{col}"
-                HAVING p > 0
-            )
-            SELECT 
-                SUM(-p * LN(p)) as entropy,
-                COUNT(*) as observed_k
-            FROM value_shares
-        """
-        result = con.execute(entropy_query).fetchone()
-        entropy = float(result[0]) if result else 0.0
-        observed_k = int(result[1]) if result else 0
+    total_rows, null_count, observed_k, entropy, top_table = row
+    total_rows = int(total_rows)
+    null_count = int(null_count)
+    entropy = float(entropy or 0.0)
 
-    # Processing outside lock (no DB access)
-    shares = result_df["share"].values
-    majority_label = str(result_df["value"].iloc[0])
-    majority_share = float(shares[0])
-    minority_share = float(shares[-1])
+    majority_label = top_table[0]["value"]
+    majority_share = top_table[0]["share"]
+    minority_share = top_table[-1]["share"]
 
     imbalance_ratio = (
         majority_share / minority_share if minority_share > 0 else float("inf")
     )
     missing_share = null_count / total_rows if total_rows > 0 else 0.0
-    effective_k = float(np.exp(entropy))
+    effective_k = math.exp(entropy)
 
     # Determine severity levels
     if majority_share >= 0.90:
@@ -478,8 +762,6 @@ def get_categorical_bias_metrics(table_name: str, col: str) -> dict | None:
     else:
         irr_level = "ok"
 
-    top_table = result_df[["value", "count", "share"]].copy()
-
     return {
         "majority_label": majority_label,
         "majority_share": majority_share,
@@ -494,3 +776,214 @@ def get_categorical_bias_metrics(table_name: str, col: str) -> dict | None:
         "top_table": top_table,
         "total": total_rows,
     }
+
+
+# ───────────────────────────────
+# Drift (PSI) helpers
+# ───────────────────────────────
+NUMERIC_TYPES = frozenset(
+    {
+        "BIGINT",
+        "INTEGER",
+        "DOUBLE",
+        "FLOAT",
+        "DECIMAL",
+        "HUGEINT",
+        "SMALLINT",
+        "TINYINT",
+        "UBIGINT",
+        "UINTEGER",
+        "USMALLINT",
+        "UTINYINT",
+        "REAL",
+    }
+)
+
+
+def is_numeric_type(column_type: str) -> bool:
+    """True for DuckDB numeric types, including parameterized ones like DECIMAL(18,3)."""
+    return column_type.split("(", 1)[0].strip().upper() in NUMERIC_TYPES
+
+
+def get_non_null_counts(table_name: str, cols: List[str]) -> dict:
+    """Non-null count per column, all columns in a single scan."""
+    counts = ", ".join(f"COUNT({quote_ident(col)})" for col in cols)
+    with cursor() as con:
+        row = con.execute(f"SELECT {counts} FROM {table_name}").fetchone()
+    return dict(zip(cols, row or [0] * len(cols)))
+
+
+# Proportions are floored before the log ratio so empty bins stay finite
+_PSI_EPS = 1e-6
+
+# Finishes a PSI query from a counts(column_name, side, bin, n) CTE; side 0 is
+# the reference. Yields aligned(column_name, r, c) proportions per bin.
+_PSI_FROM_COUNTS = f"""
+    props AS (
+        SELECT
+            column_name,
+            side,
+            bin,
+            n / SUM(n) OVER (PARTITION BY column_name, side) AS p
+        FROM counts
+    ),
+    aligned AS (
+        SELECT
+            column_name,
+            greatest(COALESCE(SUM(p) FILTER (WHERE side = 0), 0), {_PSI_EPS}) AS r,
+            greatest(COALESCE(SUM(p) FILTER (WHERE side = 1), 0), {_PSI_EPS}) AS c
+        FROM props
+        GROUP BY column_name, bin
+    )
+"""
+
+
+def _unpivoted(table_name: str, cols: List[str], value: str, side: int) -> str:
+    """
+    (side, column_name, v) rows for cols of a table, each value passed through
+    the value template ({col} is the quoted column); NULL results are dropped
+    """
+    exprs = ", ".join(
+        f"{value.format(col=quote_ident(col))} AS {quote_ident(col)}" for col in cols
+    )
+    names = ", ".join(quote_ident(col) for col in cols)
+    return f"""
+        SELECT {side} AS side, column_name, v
+        FROM (SELECT {exprs} FROM {table_name})
+        UNPIVOT (v FOR column_name IN ({names}))
+    """
+
+
+def get_numeric_psi(
+    ref_table: str,
+    cur_table: str,
+    cols: List[str],
+    n_bins: int,
+    exact: bool | None = None,
+) -> dict:
+    """
+    PSI per numeric column, all columns in one DuckDB query.
+    Bins come from reference quantiles (approx_quantile unless exact is set,
+    with the true MIN/MAX as outer edges) and are right-closed with the first
+    bin including the lowest edge; current values outside the edges are
+    dropped. A constant reference column has PSI 0. Columns with no
+    non-null reference values are left out.
+    """
+    if not cols:
+        return {}
+    if exact is None:
+        exact = EXACT_QUANTILES
+    fractions = ", ".join(f"{i}/{n_bins}" for i in range(1, n_bins))
+    # approx_quantile only binds FLOAT[] fractions; quantile_cont keeps DOUBLE
+    if exact:
+        quantiles = f"quantile_cont(v, [{fractions}])"
+    else:
+        quantiles = f"approx_quantile(v, [{fractions}]::FLOAT[])"
+    ref_vals = _unpivoted(ref_table, cols, "{col}::DOUBLE", 0)
+    cur_vals = _unpivoted(cur_table, cols, "{col}::DOUBLE", 1)
+    query = f"""
+        WITH ref_vals AS ({ref_vals}),
+        edges AS (
+            SELECT column_name, list_sort(list_distinct(
+                [MIN(v)] || {quantiles} || [MAX(v)]
+            )) AS e
+            FROM ref_vals
+            GROUP BY column_name
+        ),
+        vals AS (
+            SELECT * FROM ref_vals
+            UNION ALL
+            {cur_vals}
+        ),
+        counts AS (
+            SELECT
+                column_name,
+                side,
+                len(list_filter(e[2:len(e) - 1], x -> x < v)) AS bin,
+                COUNT(*) AS n
+            FROM vals JOIN edges USING (column_name)
+            WHERE v BETWEEN e[1] AND e[len(e)]
+            GROUP BY column_name, side, bin
+        ),
+        {_PSI_FROM_COUNTS}
+        SELECT column_name, len(e), SUM((r - c) * ln(r / c))
+        FROM edges LEFT JOIN aligned USING (column_name)
+        GROUP BY column_name, e
+    """
+    with cursor() as con:
+        rows = con.execute(query).fetchall()
+    # constant column -> no shift
+    return {col: 0.0 if n_edges < 2 else psi for col, n_edges, psi in rows}
+
+
+def get_categorical_psi(ref_table: str, cur_table: str, cols: List[str]) -> dict:
+    """
+    PSI per column treated as categorical, all columns in one DuckDB query.
+    Values are compared as strings, with NULLs folded into 'NA'.
+    """
+    if not cols:
+        return {}
+    value = "COALESCE(CAST({col} AS VARCHAR), 'NA')"
+    query = f"""
+        WITH counts AS (
+            SELECT column_name, side, v AS bin, COUNT(*) AS n
+            FROM (
+                {_unpivoted(ref_table, cols, value, 0)}
+                UNION ALL
+                {_unpivoted(cur_table, cols, value, 1)}
+            )
+            GROUP BY column_name, side, bin
+        ),
+        {_PSI_FROM_COUNTS}
+        SELECT column_name, SUM((r - c) * ln(r / c))
+        FROM aligned
+        GROUP BY column_name
+    """
+    with cursor() as con:
+        return dict(con.execute(query).fetchall())
+
+
+# ───────────────────────────────
+# Fairness helpers
+# ───────────────────────────────
+# The operator is spliced into SQL, so only these are accepted
+COMPARISON_OPERATORS = {">", "<="}
+
+
+def get_selection_rates(
+    table_name: str,
+    target_column: str,
+    threshold: float,
+    comparison_operator: str = ">",
+    group_column: str | None = None,
+) -> pa.Table:
+    """
+    Share of rows where target <op> threshold, overall or per group_column
+    value (highest rate first). Grouped results also carry the demographic
+    parity difference (max - min group rate) as parity_difference on every
+    row. Only the two columns are read; the threshold is bound as a parameter.
+    """
+    if comparison_operator not in COMPARISON_OPERATORS:
+        raise ValueError(f"Unsupported comparison operator '{comparison_operator}'")
+
+    target = quote_ident(target_column)
+    rate = f"COUNT(*) FILTER (WHERE {target} {comparison_operator} ?) / COUNT(*)"
+    if group_column is None:
+        query = f"SELECT {rate} AS selection_rate, COUNT(*) AS n FROM {table_name}"
+    else:
+        group = quote_ident(group_column)
+        query = f"""
+            WITH g AS (
+                SELECT {group} AS group, {rate} AS selection_rate, COUNT(*) AS n
+                FROM {table_name}
+                GROUP BY {group}
+            )
+            SELECT
+                *,
+                MAX(selection_rate) OVER () - MIN(selection_rate) OVER ()
+                    AS parity_difference
+            FROM g
+            ORDER BY selection_rate DESC
+        """
+    with cursor() as con:
+        return con.execute(query, [threshold]).fetch_arrow_table()